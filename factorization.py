@@ -0,0 +1,109 @@
+# factorization.py
+"""Prime factorization for the fraction visualizer.
+
+Streamlit re-executes the app script on every rerun, so the Numba kernel and
+the factorization caches live in this imported module, where they are built
+once per process and survive across Solve clicks.
+Run `python factorization.py` to check the kernel against the Python fallback.
+"""
+import numpy as np
+from collections import defaultdict
+from functools import lru_cache
+from math import prod
+from types import MappingProxyType
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, fall back to pure-Python factorization
+    njit = None
+
+# Gaps between trial divisors coprime to 30, starting from 7
+_WHEEL = np.array([4, 2, 4, 2, 4, 6, 2, 6], dtype=np.int64)
+# Trial divisors coprime to 30 within one turn of the wheel
+_WHEEL_OFFSETS = (7, 11, 13, 17, 19, 23, 29, 31)
+
+def trial_division(n):
+    """Return prime factorization of n as a {prime: exponent} dict"""
+    factors = defaultdict(int)
+    for p in (2, 3, 5):
+        while n % p == 0:
+            factors[p] += 1
+            n = n // p
+    k = 0
+    while (k + 7) * (k + 7) <= n:
+        for offset in _WHEEL_OFFSETS:
+            i = k + offset
+            while n % i == 0:
+                factors[i] += 1
+                n = n // i
+        k += 30
+    if n > 1:
+        factors[n] = 1
+    return dict(factors)
+
+if njit is not None:
+    @njit('i8[:](i8)', cache=True)
+    def factor_kernel(n):
+        """Return prime factorization of 0 < n < 2**63 as flattened (prime, exponent) pairs"""
+        out = np.empty(64, dtype=np.int64)
+        k = 0
+        for p in (2, 3, 5):
+            if n % p == 0:
+                e = 0
+                while n % p == 0:
+                    n //= p
+                    e += 1
+                out[k] = p
+                out[k+1] = e
+                k += 2
+        i = 7
+        w = 0
+        while i <= n // i:
+            if n % i == 0:
+                e = 0
+                while n % i == 0:
+                    n //= i
+                    e += 1
+                out[k] = i
+                out[k+1] = e
+                k += 2
+            i += _WHEEL[w]
+            w = (w + 1) & 7
+        if n > 1:
+            out[k] = n
+            out[k+1] = 1
+            k += 2
+        return out[:k]
+else:
+    factor_kernel = None
+
+@lru_cache(maxsize=1024)
+def factor_dict(n):
+    """Return prime factorization of n as a read-only {prime: exponent} mapping"""
+    if factor_kernel is not None and 0 < n < 2**63:
+        pairs = factor_kernel(n).tolist()
+        return MappingProxyType(dict(zip(pairs[0::2], pairs[1::2])))
+    return MappingProxyType(trial_division(n))
+
+@lru_cache(maxsize=1024)
+def prime_factors(n):
+    """Return prime factors of n as a tuple of strings with exponents"""
+    return tuple(f"{p}{'^'+str(e) if e>1 else ''}" for p, e in factor_dict(n).items())
+
+if __name__ == "__main__":
+    if factor_kernel is None:
+        raise SystemExit("numba is not installed, nothing to check")
+
+    # Kernel and fallback must agree exactly
+    samples = [*range(1, 100_000), 999983, 999983**2 * 2, 1000003 * 1000033, 2**62, 3**39]
+    for n in samples:
+        pairs = factor_kernel(n).tolist()
+        assert dict(zip(pairs[0::2], pairs[1::2])) == trial_division(n), n
+
+    # Near the int64 limit the fallback is too slow; check the kernel terminates and multiplies back
+    edge = [2**63 - 1, 2**63 - 25, 2**62 + 1]
+    for n in edge:
+        pairs = factor_kernel(n).tolist()
+        assert prod(p**e for p, e in zip(pairs[0::2], pairs[1::2])) == n, n
+
+    print(f"factor_kernel matches trial_division on {len(samples)} inputs, {len(edge)} int64 edge cases ok")
@@ -1,80 +1,80 @@
 # fraction_visualizer_streamlit.py
+import io
+import random
+import re
 import streamlit as st
+import matplotlib
+matplotlib.use('agg')
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.collections import PolyCollection
 import numpy as np
-from math import gcd
-from functools import reduce
+from collections import defaultdict
+from math import gcd, prod
+from functools import lru_cache
+from operator import itemgetter
+from types import MappingProxyType
+
+from factorization import factor_dict, prime_factors
 
 # Set page config for better layout
 st.set_page_config(page_title="Fraction Visualizer", layout="wide")
 
-def prime_factors(n):
-    """Return prime factors of n as a list of strings with exponents"""
-    factors = {}
-    while n % 2 == 0:
-        factors[2] = factors.get(2, 0) + 1
-        n = n // 2
-    i = 3
-    while i * i <= n:
-        while n % i == 0:
-            factors[i] = factors.get(i, 0) + 1
-            n = n // i
-        i += 2
-    if n > 1:
-        factors[n] = 1
-    return [f"{p}{'^'+str(e) if e>1 else ''}" for p, e in factors.items()]
-
-def lcm(a, b):
-    """Calculate the Least Common Multiple of two numbers."""
-    return a * b // gcd(a, b)
+# One term of an expression: optional run of signs, numerator, optional /denominator.
+# A run of signs counts as '-' when it holds an odd number of minuses, else '+'.
+_TOK = re.compile(r'\s*((?:[+-]\s*)*)(\d+)(?:\s*/\s*(\d+))?')
 
-def compute_lcd(denominators):
-    """Calculate the Least Common Denominator for a list of denominators."""
-    return reduce(lcm, denominators)
+def factor_and_lcd(denominators):
+    """Factorize a tuple of denominators once, returning display factors, LCD prime powers and the LCD"""
+    factor_strs = []
+    all_factors = defaultdict(int)
+    for d in denominators:
+        factor_strs.append(' × '.join(prime_factors(d)))
+        for p, e in factor_dict(d).items():
+            all_factors[p] = max(all_factors[p], e)
+    lcd = prod(p**e for p, e in all_factors.items())
+    return tuple(factor_strs), MappingProxyType(dict(all_factors)), lcd
 
+@st.cache_data(max_entries=128)
 def parse_expression(expr):
-    """Parse fraction expression into components with validation"""
-    expr = expr.replace(" ", "")
-    parts = []
-    i = 0
+    """Parse fraction expression into fractions and operators with validation"""
+    fractions = []
+    operators = []
+    pos = 0
     
-    while i < len(expr):
-        if expr[i] in '+-':
-            if parts and isinstance(parts[-1], tuple):
-                parts.append(expr[i])
-            i += 1
-        else:
-            j = i
-            while j < len(expr) and expr[j] not in '+-':
-                j += 1
-            fraction = expr[i:j]
-            
-            if fraction:
-                if '/' in fraction:
-                    try:
-                        num, denom = map(int, fraction.split('/'))
-                        if denom == 0:
-                            raise ValueError("Denominator cannot be zero")
-                    except ValueError as e:
-                        raise ValueError(f"Invalid fraction '{fraction}': {str(e)}")
-                else:
-                    try:
-                        num = int(fraction)
-                        denom = 1
-                    except ValueError:
-                        raise ValueError(f"Invalid number '{fraction}'")
-                
-                parts.append((num, denom))
-            i = j
+    for m in _TOK.finditer(expr):
+        if m.start() != pos:
+            break
+        signs, num, denom = m.groups()
+        sign = '-' if signs.count('-') % 2 else '+'
+        if fractions:
+            if not signs:
+                break
+            operators.append(sign)
+        if denom is not None and int(denom) == 0:
+            raise ValueError(f"Invalid fraction '{num}/{denom}': Denominator cannot be zero")
+        if not fractions and sign == '-':
+            num = sign + num
+        fractions.append((int(num), int(denom) if denom else 1))
+        pos = m.end()
     
-    # Validate we have exactly 3 fractions with 2 operators
-    fractions = [p for p in parts if isinstance(p, tuple)]
-    operators = [p for p in parts if isinstance(p, str)]
+    if expr[pos:].strip():
+        raise ValueError(f"Invalid expression near '{expr[pos:].strip()}'")
     
+    # Validate we have exactly 3 fractions with 2 operators
     if len(fractions) != 3 or len(operators) != 2:
         raise ValueError("Need exactly 3 fractions with 2 operators (+ or -) between them")
     
-    return parts
+    return tuple(fractions), tuple(operators)
+
+@lru_cache(maxsize=64)
+def _slice_arc(denominator, steps=50):
+    """Return cached cos/sin of the first slice's arc, a fixed steps+1 points"""
+    t = np.linspace(0, 2*np.pi/denominator, steps + 1)
+    cs, sn = np.cos(t), np.sin(t)
+    cs.flags.writeable = False
+    sn.flags.writeable = False
+    return cs, sn
 
 def draw_fraction_circle(ax, numerator, denominator, colors, title):
     """Draw fraction visualization with proper scaling and colors"""
@@ -82,17 +82,29 @@ def draw_fraction_circle(ax, numerator, denominator, colors, title):
     circle = plt.Circle((0, 0), circle_radius, fill=False, color='black', linewidth=0.8)
     ax.add_patch(circle)
     
-    for i in range(denominator):
-        angle = 2 * np.pi * i / denominator
-        x = [0, circle_radius * np.cos(angle)]
-        y = [0, circle_radius * np.sin(angle)]
-        ax.plot(x, y, color=colors[0], alpha=0.8, linewidth=0.8)
-        
-        if i < numerator:
-            wedge = np.linspace(angle, angle + 2*np.pi/denominator, 50)
-            x_wedge = np.concatenate([[0], circle_radius * np.cos(wedge)])
-            y_wedge = np.concatenate([[0], circle_radius * np.sin(wedge)])
-            ax.fill(x_wedge, y_wedge, color=colors[1], alpha=0.6)
+    # Slice start angles, shared by the radii and the wedge rotations
+    angles = 2 * np.pi * np.arange(denominator) / denominator
+    cs, sn = np.cos(angles), np.sin(angles)
+    
+    # Filled slices as a single collection: centre point followed by the
+    # cached first-slice arc rotated to each filled slice's start angle
+    filled = max(0, min(numerator, denominator))
+    if filled:
+        acs, asn = _slice_arc(denominator)
+        rc, rs = cs[:filled, None], sn[:filled, None]
+        wedges = np.zeros((filled, acs.size + 1, 2))
+        wedges[:, 1:, 0] = circle_radius * (rc*acs - rs*asn)
+        wedges[:, 1:, 1] = circle_radius * (rs*acs + rc*asn)
+        ax.add_collection(PolyCollection(wedges, color=colors[1], alpha=0.6))
+    
+    # All radii as one NaN-separated line: centre, rim point, break
+    xs = np.empty(3*denominator)
+    ys = np.empty(3*denominator)
+    xs[0::3] = ys[0::3] = 0
+    xs[1::3] = circle_radius * cs
+    ys[1::3] = circle_radius * sn
+    xs[2::3] = ys[2::3] = np.nan
+    ax.plot(xs, ys, color=colors[0], alpha=0.8, linewidth=0.8)
     
     ax.set_title(title, pad=3, fontsize=9)
     ax.set_xlim(-0.5, 0.5)
@@ -100,6 +112,27 @@ def draw_fraction_circle(ax, numerator, denominator, colors, title):
     ax.set_aspect('equal')
     ax.axis('off')
 
+@st.cache_data(max_entries=64)
+def _render_png(fractions, lcd):
+    """Render the original/converted visualization for a tuple of (num, den) pairs as PNG bytes"""
+    # A fresh Figure per render, outside pyplot's registry, so nothing mutable is shared between sessions
+    fig = Figure(figsize=(10, 5))
+    axes = fig.subplots(2, 3)
+    fig.subplots_adjust(wspace=0.4, hspace=0.4)
+    
+    # Original fractions
+    for i, (num, den) in enumerate(fractions):
+        draw_fraction_circle(axes[0,i], num, den, ('blue', 'lightblue'), f"Original: {num}/{den}")
+    
+    # Converted fractions
+    for i, (num, den) in enumerate(fractions):
+        new_num = num * (lcd // den)
+        draw_fraction_circle(axes[1,i], new_num, lcd, ('red', 'lightcoral'), f"Converted: {new_num}/{lcd}")
+    
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=72, bbox_inches="tight")
+    return buf.getvalue()
+
 def main():
     st.title("🍕 Fraction Visualizer")
     st.markdown("""
@@ -114,88 +147,59 @@ def main():
         st.write("")  # Spacer
         #if st.button("Random Example"):
         #    examples = ["1/2+1/4+1/8", "2/3-1/6+3/4", "5/6+1/3-1/2", "3/4-1/2+5/8"]
-        #    expression = np.random.choice(examples)
+        #    expression = random.choice(examples)
         #    st.experimental_rerun()
     
     if st.button("Solve"):
         try:
-            parts = parse_expression(expression)
-            fractions = [part for part in parts if isinstance(part, tuple)]
-            operators = [part for part in parts if isinstance(part, str)]
-            denominators = [f[1] for f in fractions]
-            lcd = compute_lcd(denominators)
-            converted_nums = [num * (lcd // den) for num, den in fractions]
+            fractions, operators = parse_expression(expression)
+            denominators = tuple(map(itemgetter(1), fractions))
+            factor_strs, all_factors, lcd = factor_and_lcd(denominators)
+            # Fall back to Python ints if converted numerators could overflow int64
+            dtype = np.int64 if lcd * max(1, *(abs(num) for num, _ in fractions)) < 2**61 else object
+            nums = np.fromiter(map(itemgetter(0), fractions), dtype=dtype, count=len(fractions))
+            converted_nums = nums * (lcd // np.array(denominators, dtype=dtype))
             
             # Visualization
             st.subheader("Visualization")
-            fig, axes = plt.subplots(2, 3, figsize=(12, 6))
-            plt.subplots_adjust(wspace=0.4, hspace=0.4)
-            
-            # Original fractions
-            for i, (num, den) in enumerate(fractions):
-                draw_fraction_circle(axes[0,i], num, den, ('blue', 'lightblue'), f"Original: {num}/{den}")
-            
-            # Converted fractions
-            for i, (num, den) in enumerate(fractions):
-                new_num = num * (lcd // den)
-                draw_fraction_circle(axes[1,i], new_num, lcd, ('red', 'lightcoral'), f"Converted: {new_num}/{lcd}")
-            
-            st.pyplot(fig)
+            st.image(_render_png(fractions, lcd), width="content")
             
             # Calculation steps
             st.subheader("Calculation Steps")
             
             # LCD Explanation
             with st.expander("1. Find Least Common Denominator (LCD)"):
-                st.write(f"**Denominators:** {', '.join(str(d) for d in denominators)}")
-                st.write("**Prime Factorization:**")
-                for d in denominators:
-                    st.write(f"- {d} = {' × '.join(prime_factors(d))}")
-                
-                all_factors = {}
-                for d in denominators:
-                    factors = {}
-                    n = d
-                    i = 2
-                    while i * i <= n:
-                        while n % i == 0:
-                            factors[i] = factors.get(i, 0) + 1
-                            n = n // i
-                        i += 2
-                    if n > 1:
-                        factors[n] = 1
-                    for p, cnt in factors.items():
-                        if p in all_factors:
-                            if cnt > all_factors[p]:
-                                all_factors[p] = cnt
-                        else:
-                            all_factors[p] = cnt
-                
                 lcd_factors = [f"{p}^{cnt}" if cnt>1 else str(p) for p,cnt in sorted(all_factors.items())]
-                st.write(f"**LCD Calculation:** Take highest power of each prime:")
-                st.write(f"**{' × '.join(lcd_factors)} = {lcd}**")
+                st.markdown("\n\n".join([
+                    f"**Denominators:** {', '.join(str(d) for d in denominators)}",
+                    "**Prime Factorization:**",
+                    "\n".join(f"- {d} = {factors}" for d, factors in zip(denominators, factor_strs)),
+                    "**LCD Calculation:** Take highest power of each prime:",
+                    f"**{' × '.join(lcd_factors)} = {lcd}**",
+                ]))
             
             # Conversion
             with st.expander("2. Convert each fraction"):
-                for i, (num, den) in enumerate(fractions):
-                    multiplier = lcd // den
-                    st.write(f"{num}/{den} = ({num}×{multiplier})/({den}×{multiplier}) = {num*multiplier}/{lcd}")
+                st.markdown("\n\n".join(
+                    f"{num}/{den} = ({num}×{lcd//den})/({den}×{lcd//den}) = {new_num}/{lcd}"
+                    for (num, den), new_num in zip(fractions, converted_nums)
+                ))
             
             # Calculation
-            result = converted_nums[0]
+            signs = np.fromiter((1, *(1 if op == '+' else -1 for op in operators)), dtype=dtype, count=len(fractions))
+            result = int(np.dot(converted_nums, signs))
             calculation = [f"{converted_nums[0]}/{lcd}"]
             for i, op in enumerate(operators):
                 calculation.append(f" {op} {converted_nums[i+1]}/{lcd}")
-                if op == '+':
-                    result += converted_nums[i+1]
-                else:
-                    result -= converted_nums[i+1]
             
             with st.expander("3. Perform calculation"):
-                st.write(f"{''.join(calculation)} = {result}/{lcd}")
+                st.markdown(f"{''.join(calculation)} = {result}/{lcd}")
                 
-                # Simplification
-                common_divisor = gcd(result, lcd)
+                # Simplification (0/lcd always reduces to 0/1, no gcd needed)
+                if result == 0:
+                    common_divisor = lcd
+                else:
+                    common_divisor = gcd(result, lcd)
                 if common_divisor > 1:
                     st.success(f"**Simplified:** {result}/{lcd} = {result//common_divisor}/{lcd//common_divisor}")
                 else: